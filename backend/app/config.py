@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     # Razorpay Configuration
     razorpay_webhook_secret: Optional[str] = None
     
+    # Admin API key (X-Admin-Key header for /admin endpoints)
+    admin_api_key: Optional[str] = None
+    
     # Google Service Account
     google_service_account_file: Optional[str] = "./service-account.json"
     google_service_account_json_base64: Optional[str] = None
@@ -20,10 +23,30 @@ class Settings(BaseSettings):
     tier_1_price: int = 99900   # Default ₹999
     tier_2_price: int = 149900  # Default ₹1499
     
+    # Access duration per tier in days (unset = permanent access)
+    tier_1_access_days: Optional[int] = None
+    tier_2_access_days: Optional[int] = None
+    
     # Google Sheet IDs
     indian_sheet_id: Optional[str] = None
     yc_sheet_id: Optional[str] = None
     
+    # Extra replica sheets per product (comma-separated IDs). New buyers are
+    # placed on the least-loaded sheet in the pool, primary sheet included.
+    indian_sheet_replica_ids: Optional[str] = None
+    yc_sheet_replica_ids: Optional[str] = None
+    
+    # Access lookup cache
+    access_cache_max_entries: int = 10000
+    access_cache_ttl_seconds: int = 30
+    
+    # Grant status long-poll (GET /razorpay/status/{payment_id})
+    grant_status_max_wait_seconds: int = 30
+    
+    # Expiry scheduler
+    expiry_batch_size: int = 50        # Revocations sent per batch
+    expiry_heap_size: int = 10000      # Upcoming deadlines held in memory
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         case_sensitive=False,
@@ -1,9 +1,12 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from sqlalchemy import create_engine, inspect, text, Column, Integer, String, DateTime, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
+import logging
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create SQLAlchemy engine
 engine = create_engine(
     settings.database_url,
@@ -28,4 +31,41 @@ def get_db():
 
 def init_db():
     """Initialize database tables."""
+    # Import models so every table is registered on Base.metadata
+    from app import models  # noqa: F401
+    
     Base.metadata.create_all(bind=engine)
+    migrate_db()
+
+
+def migrate_db():
+    """
+    Add columns and indexes that create_all does not add to existing tables.
+    
+    create_all only creates missing tables, so databases created by an
+    older version would otherwise fail on the first query that touches a
+    new column. Only additive changes are handled.
+    """
+    inspector = inspect(engine)
+    
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                
+                logger.info(f"Migrating database: {ddl}")
+                conn.execute(text(ddl))
+            
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -2,8 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-from app.routers import webhooks
+from app.routers import webhooks, access, admin
 from app.database import init_db
+from app.config import settings
+from app.services.google_drive_service import GoogleDriveService
+from app.services.expiry_service import expiry_scheduler
 
 # Configure logging
 logging.basicConfig(
@@ -23,10 +26,18 @@ async def lifespan(app: FastAPI):
     init_db()
     logger.info("Database initialized successfully")
     
+    try:
+        drive_service = GoogleDriveService(settings.google_service_account_file)
+    except ValueError as e:
+        logger.warning(f"Expiry scheduler disabled: Google Drive service unconfigured ({e})")
+    else:
+        await expiry_scheduler.start(drive_service)
+    
     yield
     
     # Shutdown logic
     logger.info("Shutting down application...")
+    await expiry_scheduler.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -47,6 +58,8 @@ app.add_middleware(
 
 # Include routers
 app.include_router(webhooks.router)
+app.include_router(access.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Index, UniqueConstraint
 from datetime import datetime
 from app.database import Base
 
@@ -7,6 +7,10 @@ class Payment(Base):
     """Payment record model for audit and revocation."""
     
     __tablename__ = "payments"
+    __table_args__ = (
+        # Covers the per-email active access lookup
+        Index("ix_payments_email_revoked_at", "email", "revoked_at"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     payment_id = Column(String(255), unique=True, nullable=False, index=True)
@@ -16,6 +20,45 @@ class Payment(Base):
     product_tier = Column(Integer, nullable=False)  # 1 or 2
     granted_resources = Column(Text, nullable=False)  # JSON array of sheet IDs
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)  # Set when access is revoked
+    expires_at = Column(DateTime, nullable=True, index=True)  # None = permanent
+    status = Column(String(20), nullable=False, default="granted", server_default="granted")  # or "failed"
+    failure_reason = Column(String(50), nullable=True)  # Why a failed payment was not granted
     
     def __repr__(self):
         return f"<Payment(payment_id={self.payment_id}, email={self.email}, tier={self.product_tier})>"
+
+
+class SheetReplica(Base):
+    """Replica sheet in a product's pool with its active grant count."""
+    
+    __tablename__ = "sheet_replicas"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product = Column(String(50), nullable=False, index=True)  # "indian" or "yc"
+    sheet_id = Column(String(255), unique=True, nullable=False, index=True)
+    grant_count = Column(Integer, default=0, nullable=False)  # Buyers with access to this sheet
+    
+    def __repr__(self):
+        return f"<SheetReplica(product={self.product}, sheet_id={self.sheet_id}, grants={self.grant_count})>"
+
+
+class DailyStat(Base):
+    """Pre-aggregated payment stats per day, tier and outcome."""
+    
+    __tablename__ = "daily_stats"
+    __table_args__ = (
+        UniqueConstraint("day", "tier", "status", name="uq_daily_stats_day_tier_status"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    tier = Column(Integer, nullable=False)  # 0 when the amount matched no tier
+    status = Column(String(20), nullable=False)  # "granted" or "failed"
+    payment_count = Column(Integer, default=0, nullable=False)
+    amount_sum = Column(Integer, default=0, nullable=False)  # Revenue of granted payments, in paise
+    grant_failures = Column(Integer, default=0, nullable=False)  # Drive grant errors
+    revocations = Column(Integer, default=0, nullable=False)  # Grants revoked on this day
+    
+    def __repr__(self):
+        return f"<DailyStat(day={self.day}, tier={self.tier}, status={self.status}, count={self.payment_count})>"
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+import logging
+
+from app.database import get_db
+from app.services.access_service import get_access_for_email
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/access", tags=["access"])
+
+
+@router.get("/{email}")
+async def access_lookup(
+    email: str,
+    payment_id: str = Query(..., description="Razorpay payment ID made with this email"),
+    db: Session = Depends(get_db)
+):
+    """
+    Check whether an email already has access and to which sheets.
+    
+    Used by the post-checkout page to poll for the grant. The buyer proves
+    ownership with the payment ID Razorpay returned at checkout; unknown
+    email/payment pairs get the same 404 whether or not the email exists.
+    Served from an in-process cache; the database is only queried on a
+    cache miss.
+    """
+    result = get_access_for_email(db, email, payment_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No payment found for this email and payment ID")
+    return result
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Depends, Header
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+import hmac
+import logging
+from typing import Optional
+
+from app.database import get_db
+from app.config import settings
+from app.services.stats_service import get_stats
+
+logger = logging.getLogger(__name__)
+
+
+def verify_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Dependency that checks the X-Admin-Key header against ADMIN_API_KEY."""
+    if not settings.admin_api_key:
+        logger.error("ADMIN_API_KEY is not configured")
+        raise HTTPException(status_code=500, detail="Admin API key not configured")
+    
+    if not x_admin_key or not hmac.compare_digest(x_admin_key.encode(), settings.admin_api_key.encode()):
+        logger.warning("Rejected admin request with invalid API key")
+        raise HTTPException(status_code=401, detail="Invalid admin API key")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(verify_admin_key)])
+
+
+@router.get("/stats")
+async def admin_stats(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    tier: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Revenue and grant stats for a date range (defaults to the last 30 days).
+    
+    Answered from the daily_stats rollup table, which process_payment and
+    the revocation paths keep up to date, never from the payments table.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    
+    return get_stats(db, start, end, tier)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request, HTTPException, Depends, Header
+from fastapi import APIRouter, Request, HTTPException, Depends, Header, Query
 from sqlalchemy.orm import Session
 import json
 import logging
@@ -9,6 +9,8 @@ from app.config import settings
 from app.services.razorpay_service import verify_webhook_signature, extract_payment_data
 from app.services.google_drive_service import GoogleDriveService
 from app.services.payment_service import PaymentService
+from app.services.grant_status_service import grant_status_broker
+from app.models import Payment
 
 logger = logging.getLogger(__name__)
 
@@ -155,3 +157,42 @@ async def revoke_access(
         return result
     else:
         raise HTTPException(status_code=404, detail=result["message"])
+
+
+@router.get("/status/{payment_id}")
+async def grant_status(
+    payment_id: str,
+    timeout: int = Query(25, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Long-poll for the access grant outcome of a payment.
+    
+    Returns immediately if the payment is already recorded, otherwise
+    waits up to `timeout` seconds for process_payment to publish. A
+    "pending" response means the client should poll again.
+    """
+    payment = db.query(Payment).filter(Payment.payment_id == payment_id).first()
+    if payment and payment.status == "failed":
+        return {
+            "payment_id": payment_id,
+            "status": "failed",
+            "message": f"Access not granted ({payment.failure_reason})",
+            "granted_resources": []
+        }
+    if payment:
+        return {
+            "payment_id": payment_id,
+            "status": "revoked" if payment.revoked_at else "granted",
+            "message": "Access revoked" if payment.revoked_at else "Access granted successfully",
+            "granted_resources": json.loads(payment.granted_resources)
+        }
+    
+    # Release the connection before waiting so idle clients don't hold the pool
+    db.close()
+    
+    wait = min(timeout, settings.grant_status_max_wait_seconds)
+    event = await grant_status_broker.wait_for(payment_id, wait)
+    if event is None:
+        return {"payment_id": payment_id, "status": "pending"}
+    return event
@@ -0,0 +1,211 @@
+import json
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable
+from sqlalchemy.orm import Session
+from app.models import Payment
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AccessCache:
+    """
+    In-process LRU cache with per-entry TTL for access lookups.
+
+    Entries are invalidated explicitly on grant/revoke. The TTL bounds
+    staleness when several worker processes share one database, since
+    invalidation only reaches the process that handled the change.
+
+    Each invalidation stamps the key with a new generation. A reader takes
+    the generation before querying the database and passes it to set(),
+    which drops the write if the key was invalidated in between, so a
+    read that raced a grant cannot cache the pre-grant answer.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize access cache.
+
+        Args:
+            max_entries: Maximum number of emails kept in the cache
+            ttl_seconds: Seconds an entry stays valid after being stored
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+        self._last_generation = 0
+        # Keys without a tracked generation report this floor; it only grows,
+        # so evicting a generation can never make a stale write look current
+        self._default_generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached value if present and not expired.
+
+        Args:
+            key: Cache key (email)
+
+        Returns:
+            Cached value or None on miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self, key: str) -> int:
+        """
+        Get the current generation of a key, to pass to set() after a read.
+
+        Args:
+            key: Cache key (email)
+
+        Returns:
+            Generation number
+        """
+        with self._lock:
+            return self._generations.get(key, self._default_generation)
+
+    def set(self, key: str, value: Dict[str, Any], generation: Optional[int] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key (email)
+            value: Value to cache
+            generation: Generation read before building the value; the write
+                is skipped if the key was invalidated since
+        """
+        with self._lock:
+            if generation is not None and self._generations.get(key, self._default_generation) != generation:
+                return
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drop a cached entry and start a new generation for its key.
+
+        Args:
+            key: Cache key (email)
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._last_generation += 1
+            self._generations[key] = self._last_generation
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.max_entries:
+                _, evicted = self._generations.popitem(last=False)
+                self._default_generation = max(self._default_generation, evicted)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self._last_generation += 1
+            self._default_generation = self._last_generation
+
+
+# Global cache instance shared by the access router and PaymentService
+access_cache = AccessCache(
+    max_entries=settings.access_cache_max_entries,
+    ttl_seconds=settings.access_cache_ttl_seconds
+)
+
+
+def get_access_for_email(db: Session, email: str, payment_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Look up active access for an email, served from the cache when possible.
+
+    The caller must present a payment ID made with that email, so access
+    details are only disclosed to the buyer. Negative results are cached
+    as well, so polling before the webhook lands does not hit the
+    database; the grant invalidates the entry.
+
+    Args:
+        db: Database session
+        email: Buyer's email
+        payment_id: Razorpay payment ID made with this email
+
+    Returns:
+        Dictionary with access status, tiers and granted sheet IDs, or
+        None if the payment ID does not belong to the email
+    """
+    email = email.strip()
+    entry = access_cache.get(email)
+    if entry is None:
+        generation = access_cache.generation(email)
+        entry = _load_access(db, email)
+        access_cache.set(email, entry, generation)
+
+    if payment_id not in entry["payment_ids"]:
+        return None
+    return entry["access"]
+
+
+def _load_access(db: Session, email: str) -> Dict[str, Any]:
+    """
+    Build the cache entry for an email from its payment records.
+
+    Args:
+        db: Database session
+        email: Buyer's email
+
+    Returns:
+        Dictionary with the email's payment IDs and its access summary
+    """
+    # Indexed lookup on email; only fetch the columns we need
+    rows = (
+        db.query(
+            Payment.payment_id,
+            Payment.product_tier,
+            Payment.granted_resources,
+            Payment.status,
+            Payment.revoked_at
+        )
+        .filter(Payment.email == email)
+        .all()
+    )
+
+    payment_ids = set()
+    tiers = set()
+    resources = []
+    for payment_id, tier, granted_resources, status, revoked_at in rows:
+        payment_ids.add(payment_id)
+        if status != "granted" or revoked_at is not None:
+            continue
+        tiers.add(tier)
+        for sheet_id in json.loads(granted_resources):
+            if sheet_id not in resources:
+                resources.append(sheet_id)
+
+    return {
+        "payment_ids": frozenset(payment_ids),
+        "access": {
+            "email": email,
+            "has_access": bool(resources),
+            "tiers": sorted(tiers),
+            "granted_resources": resources
+        }
+    }
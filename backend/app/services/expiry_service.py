@@ -0,0 +1,327 @@
+import asyncio
+import heapq
+import json
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models import Payment
+from app.config import settings
+from app.database import SessionLocal
+from app.services.access_service import access_cache
+from app.services.sheet_pool_service import release_grants
+from app.services.stats_service import record_stat
+
+logger = logging.getLogger(__name__)
+
+# Delay before retrying after a failed revocation, doubled per failed attempt
+RETRY_DELAY_SECONDS = 60
+MAX_RETRY_DELAY_SECONDS = 6 * 60 * 60
+
+
+class ExpiryScheduler:
+    """
+    Revokes time-bounded grants when they expire.
+
+    Keeps a min-heap of the next deadlines in memory, loaded from the
+    indexed expires_at column, and sleeps until the earliest one is due.
+    New grants are pushed onto the heap as they are recorded, so the
+    payments table is never rescanned. When the heap was truncated at
+    load time, it is refilled from the index once nothing loaded is due
+    before the truncation point. Failed revocations are retried with
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        heap_size: int,
+        drive_service=None,
+        session_factory: Callable[[], Session] = SessionLocal,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        """
+        Initialize expiry scheduler.
+
+        Args:
+            batch_size: Maximum number of grants revoked per batch
+            heap_size: Maximum number of deadlines loaded from the database
+            drive_service: Google Drive service instance (or set in start)
+            session_factory: Database session factory
+            clock: UTC time source (injectable for tests)
+        """
+        self.batch_size = batch_size
+        self.heap_size = heap_size
+        self._session_factory = session_factory
+        self._clock = clock
+        self._heap: List[Tuple[datetime, int]] = []  # (expires_at, payment row id)
+        self._horizon: Optional[datetime] = None  # Last loaded deadline if truncated
+        self._retries: Dict[int, Tuple[int, datetime]] = {}  # payment row id -> (attempts, retry at)
+        self._lock = threading.Lock()
+        self._drive_service = drive_service
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> int:
+        """
+        Load the next pending deadlines from the database into the heap.
+
+        Payments backing off after a failed revocation are kept at their
+        retry time and do not take up loaded slots.
+
+        Returns:
+            Number of deadlines loaded
+        """
+        with self._lock:
+            retries = dict(self._retries)
+
+        db = self._session_factory()
+        try:
+            query = db.query(Payment.expires_at, Payment.id).filter(
+                Payment.expires_at.isnot(None),
+                Payment.revoked_at.is_(None)
+            )
+            if retries:
+                query = query.filter(Payment.id.notin_(list(retries)))
+            rows = query.order_by(Payment.expires_at).limit(self.heap_size).all()
+        finally:
+            db.close()
+
+        with self._lock:
+            self._heap = [(expires_at, payment_row_id) for expires_at, payment_row_id in rows]
+            self._heap.extend((retry_at, payment_row_id) for payment_row_id, (_, retry_at) in retries.items())
+            heapq.heapify(self._heap)
+            self._horizon = rows[-1][0] if len(rows) == self.heap_size else None
+
+        logger.info(f"Loaded {len(rows)} pending access expiries")
+        return len(rows)
+
+    def schedule(self, payment_row_id: int, expires_at: datetime) -> None:
+        """
+        Track a newly recorded grant's deadline.
+
+        Does nothing while the scheduler is not running; start() loads
+        pending deadlines from the database anyway. Safe to call from
+        synchronous code on any thread.
+
+        Args:
+            payment_row_id: Payment primary key
+            expires_at: When the grant expires
+        """
+        if self._task is None:
+            return
+
+        with self._lock:
+            if self._horizon is not None and expires_at > self._horizon:
+                # Beyond what is loaded; picked up when the heap is refilled
+                return
+            heapq.heappush(self._heap, (expires_at, payment_row_id))
+
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def next_deadline(self) -> Optional[datetime]:
+        """Get the earliest pending deadline, if any."""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self) -> int:
+        """
+        Revoke one batch of grants whose deadline has passed.
+
+        Returns:
+            Number of grants revoked
+        """
+        now = self._clock()
+
+        with self._lock:
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._heap))
+            # Unloaded rows may be due before anything left in the heap
+            needs_refill = self._horizon is not None and (not self._heap or self._heap[0][0] > self._horizon)
+
+        if not due:
+            if needs_refill:
+                self.load()
+            return 0
+
+        try:
+            revoked_count, retry_ids = self._revoke_batch([payment_row_id for _, payment_row_id in due], now)
+        except Exception:
+            with self._lock:
+                for entry in due:
+                    heapq.heappush(self._heap, entry)
+            raise
+
+        with self._lock:
+            for _, payment_row_id in due:
+                if payment_row_id not in retry_ids:
+                    self._retries.pop(payment_row_id, None)
+
+            for payment_row_id in retry_ids:
+                attempts = self._retries.get(payment_row_id, (0, now))[0] + 1
+                delay = min(RETRY_DELAY_SECONDS * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                retry_at = now + timedelta(seconds=delay)
+                self._retries[payment_row_id] = (attempts, retry_at)
+                heapq.heappush(self._heap, (retry_at, payment_row_id))
+                logger.warning(
+                    f"Revocation of expired payment {payment_row_id} failed "
+                    f"(attempt {attempts}), retrying at {retry_at}"
+                )
+
+        return revoked_count
+
+    def _revoke_batch(self, payment_row_ids: List[int], now: datetime) -> Tuple[int, List[int]]:
+        """
+        Revoke access for a batch of expired payments and record it.
+
+        A payment is only marked revoked once Drive confirmed every one of
+        its permissions is gone; the others are returned for a retry.
+
+        Args:
+            payment_row_ids: Payment primary keys to expire
+            now: Current time
+
+        Returns:
+            Number of payments marked revoked, and payment keys to retry
+        """
+        db = self._session_factory()
+        try:
+            payments = (
+                db.query(Payment)
+                .filter(
+                    Payment.id.in_(payment_row_ids),
+                    Payment.revoked_at.is_(None),
+                    Payment.expires_at <= now
+                )
+                .all()
+            )
+            if not payments:
+                return 0, []
+
+            # Sheets still covered by another active payment keep their access
+            emails = {payment.email for payment in payments}
+            active = (
+                db.query(Payment.email, Payment.granted_resources)
+                .filter(
+                    Payment.email.in_(emails),
+                    Payment.revoked_at.is_(None),
+                    Payment.id.notin_(payment_row_ids),
+                    or_(Payment.expires_at.is_(None), Payment.expires_at > now)
+                )
+                .all()
+            )
+            still_covered = {
+                (email, sheet_id)
+                for email, granted_resources in active
+                for sheet_id in json.loads(granted_resources)
+            }
+
+            emails_by_sheet: Dict[str, Set[str]] = {}
+            for payment in payments:
+                for sheet_id in json.loads(payment.granted_resources):
+                    if (payment.email, sheet_id) not in still_covered:
+                        emails_by_sheet.setdefault(sheet_id, set()).add(payment.email)
+
+            failed: Set[Tuple[str, str]] = set()
+            for sheet_id, sheet_emails in emails_by_sheet.items():
+                revoked = set(self._drive_service.revoke_multiple_access(sheet_id, sorted(sheet_emails)))
+                for email in sheet_emails - revoked:
+                    failed.add((email, sheet_id))
+
+            revoked_payments = []
+            retry_ids = []
+            for payment in payments:
+                if any((payment.email, sheet_id) in failed for sheet_id in json.loads(payment.granted_resources)):
+                    retry_ids.append(payment.id)
+                    # Pairs of a payment left active still count against their replica
+                    still_covered.update(
+                        (payment.email, sheet_id) for sheet_id in json.loads(payment.granted_resources)
+                    )
+                    continue
+                payment.revoked_at = now
+                record_stat(db, payment.product_tier, "granted", at=now, revocations=1)
+                revoked_payments.append(payment)
+
+            # Replica counts track Drive permissions: release each removed pair once
+            released = {
+                (payment.email, sheet_id)
+                for payment in revoked_payments
+                for sheet_id in json.loads(payment.granted_resources)
+            } - still_covered
+            release_grants(db, [sheet_id for _, sheet_id in released])
+            db.commit()
+
+            for email in {payment.email for payment in revoked_payments}:
+                access_cache.invalidate(email.strip())
+
+            if revoked_payments:
+                logger.info(f"Expired access for {len(revoked_payments)} payments")
+            return len(revoked_payments), retry_ids
+
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def start(self, drive_service) -> None:
+        """
+        Load pending deadlines and start the background task.
+
+        Args:
+            drive_service: Google Drive service instance
+        """
+        self._drive_service = drive_service
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Expiry scheduler started")
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        logger.info("Expiry scheduler stopped")
+
+    async def _run(self) -> None:
+        """Sleep until the earliest deadline (or a new grant), then revoke."""
+        while True:
+            self._wakeup.clear()
+            timeout = None
+
+            try:
+                if await asyncio.to_thread(self.run_due):
+                    # More grants may be due; keep draining in batches
+                    continue
+            except Exception as e:
+                logger.exception(f"Failed to revoke expired grants: {e}")
+                timeout = RETRY_DELAY_SECONDS
+
+            deadline = self.next_deadline()
+            if timeout is None and deadline is not None:
+                timeout = max((deadline - self._clock()).total_seconds(), 0)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Global scheduler instance started in the app lifespan
+expiry_scheduler = ExpiryScheduler(
+    batch_size=settings.expiry_batch_size,
+    heap_size=settings.expiry_heap_size
+)
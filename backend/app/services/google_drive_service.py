@@ -1,7 +1,7 @@
 import os
 import json
 import base64
-from typing import List, Optional
+from typing import Dict, List, Optional
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 # Google Drive API scopes
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# Maximum number of calls in a single Google API batch request
+BATCH_LIMIT = 100
+
 
 class GoogleDriveService:
     """Service for managing Google Drive permissions."""
@@ -105,24 +108,16 @@ class GoogleDriveService:
             email: User's email address
             
         Returns:
-            True if successful, False otherwise
+            True if the email no longer has access (revoked, or no permission
+            existed), False if the Drive API call failed
         """
         try:
             # First, find the permission ID for this email
-            permissions = self.service.permissions().list(
-                fileId=file_id,
-                fields='permissions(id,emailAddress)'
-            ).execute()
-            
-            permission_id = None
-            for perm in permissions.get('permissions', []):
-                if perm.get('emailAddress') == email:
-                    permission_id = perm.get('id')
-                    break
+            permission_id = self._find_permission_ids(file_id, [email]).get(email.casefold())
             
             if not permission_id:
                 logger.warning(f"No permission found for {email} on file {file_id}")
-                return False
+                return True
             
             # Delete the permission
             self.service.permissions().delete(
@@ -137,6 +132,47 @@ class GoogleDriveService:
             logger.error(f"Failed to revoke access for {email} from file {file_id}: {error}")
             return False
     
+    def _find_permission_ids(self, file_id: str, emails: List[str]) -> Dict[str, str]:
+        """
+        Find the permission IDs of several emails on a file.
+        
+        Walks every page of the permission list. Emails are matched
+        case-insensitively, since Drive stores addresses lowercased while
+        payments keep the address as the buyer typed it.
+        
+        Args:
+            file_id: Google Sheet ID
+            emails: Email addresses to look up
+            
+        Returns:
+            Mapping of casefolded email to permission ID, for emails found
+            
+        Raises:
+            HttpError: If listing permissions fails
+        """
+        wanted = {email.casefold() for email in emails}
+        permission_ids = {}
+        
+        page_token = None
+        while True:
+            response = self.service.permissions().list(
+                fileId=file_id,
+                fields='nextPageToken,permissions(id,emailAddress)',
+                pageSize=100,
+                pageToken=page_token
+            ).execute()
+            
+            for perm in response.get('permissions', []):
+                address = (perm.get('emailAddress') or '').casefold()
+                if address in wanted:
+                    permission_ids[address] = perm.get('id')
+            
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        
+        return permission_ids
+    
     def grant_multiple_access(self, file_ids: List[str], email: str) -> List[str]:
         """
         Grant access to multiple files for a user.
@@ -153,3 +189,59 @@ class GoogleDriveService:
             if self.grant_access(file_id, email):
                 granted.append(file_id)
         return granted
+    
+    def revoke_multiple_access(self, file_id: str, emails: List[str]) -> List[str]:
+        """
+        Revoke access to a Google Sheet for several emails at once.
+        
+        Lists the file's permissions once and sends the deletions as
+        batched HTTP requests instead of one list + delete per email.
+        
+        Args:
+            file_id: Google Sheet ID
+            emails: Email addresses to revoke
+            
+        Returns:
+            List of emails that no longer have access (revoked, or no
+            permission existed); emails missing from it failed
+        """
+        # Emails differing only in case share one Drive permission
+        emails_by_address: Dict[str, List[str]] = {}
+        for email in emails:
+            emails_by_address.setdefault(email.casefold(), []).append(email)
+        
+        try:
+            permission_ids = self._find_permission_ids(file_id, emails)
+        except HttpError as error:
+            logger.error(f"Failed to list permissions for file {file_id}: {error}")
+            return []
+        
+        revoked = []
+        for address in set(emails_by_address) - set(permission_ids):
+            logger.warning(f"No permission found for {address} on file {file_id}")
+            revoked.extend(emails_by_address[address])
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                logger.error(f"Failed to revoke access for {request_id} from file {file_id}: {exception}")
+            else:
+                revoked.extend(emails_by_address[request_id])
+        
+        items = list(permission_ids.items())
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for address, permission_id in items[start:start + BATCH_LIMIT]:
+                batch.add(
+                    self.service.permissions().delete(
+                        fileId=file_id,
+                        permissionId=permission_id
+                    ),
+                    request_id=address
+                )
+            try:
+                batch.execute()
+            except HttpError as error:
+                logger.error(f"Batch revocation failed for file {file_id}: {error}")
+        
+        logger.info(f"Revoked access for {len(revoked)} of {len(emails)} emails from file {file_id}")
+        return revoked
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class GrantStatusBroker:
+    """
+    In-process pub/sub for grant outcomes, keyed by payment ID.
+
+    Waiting clients each hold a future that is resolved when
+    process_payment publishes, so no client polls the database. The last
+    outcome per payment is kept in a bounded LRU so clients that connect
+    between their database check and registering a waiter still get the
+    answer instead of waiting out the timeout.
+    """
+
+    def __init__(self, max_recent: int = 10000):
+        """
+        Initialize grant status broker.
+
+        Args:
+            max_recent: Maximum number of recent outcomes remembered
+        """
+        self.max_recent = max_recent
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_recent(self, payment_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the last published outcome for a payment, if remembered.
+
+        Args:
+            payment_id: Razorpay payment ID
+
+        Returns:
+            Published status event or None
+        """
+        with self._lock:
+            return self._recent.get(payment_id)
+
+    def publish(self, payment_id: str, event: Dict[str, Any]) -> None:
+        """
+        Publish a grant outcome and wake every client waiting on it.
+
+        Safe to call from synchronous code on any thread.
+
+        Args:
+            payment_id: Razorpay payment ID
+            event: Status event delivered to waiters
+        """
+        with self._lock:
+            self._recent[payment_id] = event
+            self._recent.move_to_end(payment_id)
+            while len(self._recent) > self.max_recent:
+                self._recent.popitem(last=False)
+            waiters = self._waiters.pop(payment_id, set())
+
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, event)
+
+        if waiters:
+            logger.info(f"Published grant status for {payment_id} to {len(waiters)} waiting clients")
+
+    async def wait_for(self, payment_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until an outcome is published for a payment.
+
+        Args:
+            payment_id: Razorpay payment ID
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Published status event or None on timeout
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = (loop, future)
+
+        with self._lock:
+            # Check under the lock so a concurrent publish cannot be missed
+            recent = self._recent.get(payment_id)
+            if recent is not None:
+                return recent
+            self._waiters.setdefault(payment_id, set()).add(waiter)
+
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(payment_id)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[payment_id]
+
+
+def _resolve(future: asyncio.Future, event: Dict[str, Any]) -> None:
+    """Resolve a waiter's future unless it was already cancelled."""
+    if not future.done():
+        future.set_result(event)
+
+
+# Global broker instance shared by the webhook router and PaymentService
+grant_status_broker = GrantStatusBroker()
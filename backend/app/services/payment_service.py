@@ -1,10 +1,21 @@
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Set
 from sqlalchemy.orm import Session
 from app.models import Payment
 from app.config import settings
 from app.services.google_drive_service import GoogleDriveService
+from app.services.access_service import access_cache
+from app.services.grant_status_service import grant_status_broker
+from app.services.expiry_service import expiry_scheduler
+from app.services.sheet_pool_service import (
+    get_held_sheet_ids,
+    pick_replica,
+    record_grants,
+    release_grants
+)
+from app.services.stats_service import record_stat
 
 logger = logging.getLogger(__name__)
 
@@ -39,31 +50,69 @@ class PaymentService:
             logger.warning(f"Unknown payment amount: {amount}")
             return None
     
-    def get_sheet_ids_for_tier(self, tier: int) -> List[str]:
+    def get_products_for_tier(self, tier: int) -> List[str]:
+        """
+        Get list of products included in a given tier.
+        
+        Args:
+            tier: Product tier (1 or 2)
+            
+        Returns:
+            List of product names
+        """
+        if tier == 1:
+            return ["indian"]
+        elif tier == 2:
+            return ["indian", "yc"]
+        return []
+    
+    def get_sheet_ids_for_tier(self, db: Session, tier: int, held: Optional[Set[str]] = None) -> List[str]:
         """
         Get list of sheet IDs for a given tier.
         
+        Each product may have a pool of replica sheets; one sheet per product
+        is chosen (the least-loaded replica, or the one the buyer already holds).
+        
         Args:
+            db: Database session
             tier: Product tier (1 or 2)
+            held: Sheet IDs the buyer already has access to, so repeat
+                buyers stay on the same replica
             
         Returns:
             List of Google Sheet IDs
         """
+        held = held or set()
+        
         sheet_ids = []
-        if tier == 1:
-            if settings.indian_sheet_id:
-                sheet_ids.append(settings.indian_sheet_id)
-        elif tier == 2:
-            if settings.indian_sheet_id:
-                sheet_ids.append(settings.indian_sheet_id)
-            if settings.yc_sheet_id:
-                sheet_ids.append(settings.yc_sheet_id)
+        for product in self.get_products_for_tier(tier):
+            sheet_id = pick_replica(db, product, held)
+            if sheet_id:
+                sheet_ids.append(sheet_id)
         
         if not sheet_ids:
             logger.warning(f"No sheet IDs configured for tier {tier}")
             
         return sheet_ids
     
+    def get_access_duration(self, tier: int) -> Optional[timedelta]:
+        """
+        Get how long access lasts for a given tier.
+        
+        Args:
+            tier: Product tier (1 or 2)
+            
+        Returns:
+            Access duration, or None for permanent access
+        """
+        days = None
+        if tier == 1:
+            days = settings.tier_1_access_days
+        elif tier == 2:
+            days = settings.tier_2_access_days
+        
+        return timedelta(days=days) if days else None
+    
     def process_payment(
         self,
         db: Session,
@@ -73,7 +122,12 @@ class PaymentService:
         amount: int
     ) -> Dict[str, Any]:
         """
-        Process a successful payment and grant access.
+        Process a successful payment and publish the grant outcome.
+        
+        Clients waiting on /razorpay/status/{payment_id} are woken with the
+        result, whether the grant succeeded or failed. Replays of an already
+        granted payment publish nothing, so they cannot overwrite the
+        remembered grant with an event that lists no resources.
         
         Args:
             db: Database session
@@ -85,59 +139,114 @@ class PaymentService:
         Returns:
             Dictionary with success status and details
         """
-        # Check if payment already processed
+        result = self._process_payment(db, payment_id, order_id, email, amount)
+        if result.get("already_processed"):
+            return result
+        
+        grant_status_broker.publish(payment_id, {
+            "payment_id": payment_id,
+            "status": "granted" if result["success"] else "failed",
+            "message": result["message"],
+            "granted_resources": result.get("granted_resources", [])
+        })
+        return result
+    
+    def _process_payment(
+        self,
+        db: Session,
+        payment_id: str,
+        order_id: Optional[str],
+        email: str,
+        amount: int
+    ) -> Dict[str, Any]:
+        """
+        Process a successful payment and grant access.
+        
+        Args:
+            db: Database session
+            payment_id: Razorpay payment ID
+            order_id: Razorpay order ID
+            email: Buyer's email
+            amount: Payment amount
+            
+        Returns:
+            Dictionary with success status and details; already_processed
+            is set when the payment had been granted before this call
+        """
+        # Check if payment already processed; failed attempts are retried
         existing = db.query(Payment).filter(Payment.payment_id == payment_id).first()
-        if existing:
+        if existing and existing.status == "granted":
             logger.info(f"Payment {payment_id} already processed")
             return {
                 "success": True,
                 "message": "Payment already processed",
-                "payment_id": payment_id
+                "payment_id": payment_id,
+                "already_processed": True
             }
         
         # Determine tier
         tier = self.determine_tier(amount)
         if tier is None:
             logger.error(f"Invalid amount {amount} for payment {payment_id}")
-            return {
-                "success": False,
-                "message": f"Invalid payment amount: {amount}",
-                "payment_id": payment_id
-            }
+            return self._record_failure(
+                db, existing, payment_id, order_id, email, amount, None,
+                "invalid_amount", f"Invalid payment amount: {amount}"
+            )
         
         # Get sheet IDs for tier
-        sheet_ids = self.get_sheet_ids_for_tier(tier)
+        held = get_held_sheet_ids(db, email)
+        sheet_ids = self.get_sheet_ids_for_tier(db, tier, held)
         if not sheet_ids:
             logger.error(f"No sheets configured for tier {tier}")
-            return {
-                "success": False,
-                "message": f"No resources configured for tier {tier}",
-                "payment_id": payment_id
-            }
+            return self._record_failure(
+                db, existing, payment_id, order_id, email, amount, tier,
+                "no_resources", f"No resources configured for tier {tier}"
+            )
         
         # Grant access to sheets
         granted_sheets = self.drive_service.grant_multiple_access(sheet_ids, email)
         
         if not granted_sheets:
             logger.error(f"Failed to grant access for payment {payment_id}")
-            return {
-                "success": False,
-                "message": "Failed to grant access to resources",
-                "payment_id": payment_id
-            }
+            return self._record_failure(
+                db, existing, payment_id, order_id, email, amount, tier,
+                "grant_failed", "Failed to grant access to resources"
+            )
+        
+        # Time-bounded tiers expire relative to the grant
+        duration = self.get_access_duration(tier)
+        expires_at = datetime.utcnow() + duration if duration else None
         
         # Persist payment record
         try:
-            payment = Payment(
-                payment_id=payment_id,
-                razorpay_order_id=order_id,
-                email=email,
-                amount=amount,
-                product_tier=tier,
-                granted_resources=json.dumps(granted_sheets)
-            )
-            db.add(payment)
+            if existing:
+                # A retried failure now succeeds: move it out of the failed stats
+                record_stat(
+                    db, existing.product_tier, "failed", at=existing.timestamp,
+                    payment_count=-1,
+                    grant_failures=-1 if existing.failure_reason == "grant_failed" else 0
+                )
+                payment = existing
+            else:
+                payment = Payment(payment_id=payment_id)
+                db.add(payment)
+            
+            payment.razorpay_order_id = order_id
+            payment.email = email
+            payment.amount = amount
+            payment.product_tier = tier
+            payment.granted_resources = json.dumps(granted_sheets)
+            payment.expires_at = expires_at
+            payment.status = "granted"
+            payment.failure_reason = None
+            
+            # Replica counts track Drive permissions, so only new (email, sheet) pairs count
+            record_grants(db, [sheet_id for sheet_id in granted_sheets if sheet_id not in held])
+            record_stat(db, tier, "granted", payment_count=1, amount_sum=amount)
             db.commit()
+            access_cache.invalidate(email.strip())
+            if expires_at:
+                expiry_scheduler.schedule(payment.id, expires_at)
             
             logger.info(f"Successfully processed payment {payment_id} for {email}, tier {tier}")
             return {
@@ -145,17 +254,97 @@ class PaymentService:
                 "message": "Access granted successfully",
                 "payment_id": payment_id,
                 "tier": tier,
-                "granted_resources": granted_sheets
+                "granted_resources": granted_sheets,
+                "expires_at": expires_at.isoformat() if expires_at else None
             }
             
         except Exception as e:
             db.rollback()
             logger.error(f"Database error for payment {payment_id}: {e}")
-            return {
-                "success": False,
-                "message": "Failed to record payment",
-                "payment_id": payment_id
-            }
+            
+            # A concurrent delivery of the same webhook may have recorded it first
+            existing = db.query(Payment).filter(Payment.payment_id == payment_id).first()
+            if existing and existing.status == "granted":
+                logger.info(f"Payment {payment_id} was recorded by a concurrent request")
+                return {
+                    "success": True,
+                    "message": "Payment already processed",
+                    "payment_id": payment_id,
+                    "already_processed": True
+                }
+            
+            return self._record_failure(
+                db, existing, payment_id, order_id, email, amount, tier,
+                "record_failed", "Failed to record payment"
+            )
+    
+    def _record_failure(
+        self,
+        db: Session,
+        existing: Optional[Payment],
+        payment_id: str,
+        order_id: Optional[str],
+        email: str,
+        amount: int,
+        tier: Optional[int],
+        reason: str,
+        message: str
+    ) -> Dict[str, Any]:
+        """
+        Persist a failed payment and count it in the stats rollup.
+        
+        The failed row keys the stats by payment ID, so a replayed webhook
+        for the same payment is counted once. Failed payments are not
+        fulfilled, so their amount is not added to amount_sum (revenue).
+        
+        Args:
+            db: Database session
+            existing: Earlier failed record for this payment, if any
+            payment_id: Razorpay payment ID
+            order_id: Razorpay order ID
+            email: Buyer's email
+            amount: Payment amount
+            tier: Product tier (None when the amount matched no tier)
+            reason: Failure reason (e.g. "grant_failed")
+            message: Message returned to the caller
+            
+        Returns:
+            Dictionary with failure status and details
+        """
+        try:
+            if existing is None:
+                db.add(Payment(
+                    payment_id=payment_id,
+                    razorpay_order_id=order_id,
+                    email=email,
+                    amount=amount or 0,
+                    product_tier=tier or 0,
+                    granted_resources="[]",
+                    status="failed",
+                    failure_reason=reason
+                ))
+                record_stat(
+                    db, tier, "failed",
+                    payment_count=1,
+                    grant_failures=1 if reason == "grant_failed" else 0
+                )
+            elif existing.failure_reason != reason:
+                # Replay failed differently; already counted, only adjust grant failures
+                record_stat(
+                    db, existing.product_tier, "failed", at=existing.timestamp,
+                    grant_failures=(reason == "grant_failed") - (existing.failure_reason == "grant_failed")
+                )
+                existing.failure_reason = reason
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to record failed payment {payment_id}: {e}")
+        
+        return {
+            "success": False,
+            "message": message,
+            "payment_id": payment_id
+        }
     
     def revoke_access_for_email(self, db: Session, email: str) -> Dict[str, Any]:
         """
@@ -168,7 +357,10 @@ class PaymentService:
         Returns:
             Dictionary with revocation status
         """
-        payments = db.query(Payment).filter(Payment.email == email).all()
+        payments = db.query(Payment).filter(
+            Payment.email == email,
+            Payment.status == "granted"
+        ).all()
         
         if not payments:
             return {
@@ -177,15 +369,42 @@ class PaymentService:
             }
         
         revoked_count = 0
+        failed_count = 0
+        released_sheets = set()
         for payment in payments:
             sheet_ids = json.loads(payment.granted_resources)
+            all_revoked = True
             for sheet_id in sheet_ids:
                 if self.drive_service.revoke_access(sheet_id, email):
                     revoked_count += 1
+                else:
+                    failed_count += 1
+                    all_revoked = False
+            
+            # Keep the grant active if Drive still holds any of its permissions
+            if not all_revoked:
+                logger.error(f"Failed to fully revoke payment {payment.payment_id} for {email}")
+            elif payment.revoked_at is None:
+                payment.revoked_at = datetime.utcnow()
+                released_sheets.update(sheet_ids)
+                record_stat(db, payment.product_tier, "granted", revocations=1)
+        
+        # Sheets still covered by a payment left active keep their replica count
+        still_covered = {
+            sheet_id
+            for payment in payments if payment.revoked_at is None
+            for sheet_id in json.loads(payment.granted_resources)
+        }
+        release_grants(db, sorted(released_sheets - still_covered))
+        
+        db.commit()
+        access_cache.invalidate(email.strip())
         
         return {
             "success": True,
-            "message": f"Revoked access to {revoked_count} resources for {email}",
+            "message": f"Revoked access to {revoked_count} resources for {email}"
+                       + (f" ({failed_count} failed, retry to complete)" if failed_count else ""),
             "email": email,
-            "revoked_count": revoked_count
+            "revoked_count": revoked_count,
+            "failed_count": failed_count
         }
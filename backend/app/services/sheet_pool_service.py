@@ -0,0 +1,173 @@
+import json
+import logging
+from typing import List, Optional, Set
+from sqlalchemy import distinct, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Payment, SheetReplica
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_sheet_pool(product: str) -> List[str]:
+    """
+    Get the configured sheet IDs for a product, primary sheet first.
+
+    Args:
+        product: Product name ("indian" or "yc")
+
+    Returns:
+        List of Google Sheet IDs
+    """
+    if product == "indian":
+        primary, replicas = settings.indian_sheet_id, settings.indian_sheet_replica_ids
+    elif product == "yc":
+        primary, replicas = settings.yc_sheet_id, settings.yc_sheet_replica_ids
+    else:
+        return []
+
+    pool = [primary] if primary else []
+    for sheet_id in (replicas or "").split(","):
+        sheet_id = sheet_id.strip()
+        if sheet_id and sheet_id not in pool:
+            pool.append(sheet_id)
+    return pool
+
+
+def get_held_sheet_ids(db: Session, email: str) -> Set[str]:
+    """
+    Get the sheets an email currently has active grants on.
+
+    Args:
+        db: Database session
+        email: Buyer's email
+
+    Returns:
+        Set of Google Sheet IDs
+    """
+    rows = (
+        db.query(Payment.granted_resources)
+        .filter(
+            Payment.email == email,
+            Payment.status == "granted",
+            Payment.revoked_at.is_(None)
+        )
+        .all()
+    )
+    return {sheet_id for (granted_resources,) in rows for sheet_id in json.loads(granted_resources)}
+
+
+def pick_replica(db: Session, product: str, held: Set[str]) -> Optional[str]:
+    """
+    Choose the sheet in a product's pool to grant a buyer access to.
+
+    Buyers who already hold a sheet in the pool stay on it; everyone else
+    goes to the replica with the fewest viewers.
+
+    Args:
+        db: Database session
+        product: Product name ("indian" or "yc")
+        held: Sheet IDs the buyer already has access to
+
+    Returns:
+        Google Sheet ID, or None if the product has no sheets configured
+    """
+    pool = get_sheet_pool(product)
+    if not pool:
+        return None
+
+    for sheet_id in pool:
+        if sheet_id in held:
+            return sheet_id
+
+    if len(pool) == 1:
+        return pool[0]
+
+    _ensure_replicas(db, product, pool)
+    replica = (
+        db.query(SheetReplica)
+        .filter(SheetReplica.sheet_id.in_(pool))
+        .order_by(SheetReplica.grant_count, SheetReplica.id)
+        .first()
+    )
+    return replica.sheet_id if replica else pool[0]
+
+
+def _ensure_replicas(db: Session, product: str, pool: List[str]) -> None:
+    """
+    Create tracking rows for newly configured sheets in a pool.
+
+    A new row is seeded with the number of buyers actively holding the
+    sheet, so adding replicas to a live deployment balances against the
+    real load.
+
+    Args:
+        db: Database session
+        product: Product name
+        pool: Configured sheet IDs for the product
+    """
+    existing = {
+        sheet_id for (sheet_id,) in
+        db.query(SheetReplica.sheet_id).filter(SheetReplica.sheet_id.in_(pool)).all()
+    }
+    missing = [sheet_id for sheet_id in pool if sheet_id not in existing]
+    if not missing:
+        return
+
+    for sheet_id in missing:
+        count = (
+            db.query(func.count(distinct(Payment.email)))
+            .filter(
+                Payment.revoked_at.is_(None),
+                Payment.granted_resources.like(f'%"{sheet_id}"%')
+            )
+            .scalar()
+        )
+        db.add(SheetReplica(product=product, sheet_id=sheet_id, grant_count=count))
+        logger.info(f"Tracking replica {sheet_id} for {product} with {count} active viewers")
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request registered the same replica first
+        db.rollback()
+
+
+def record_grants(db: Session, sheet_ids: List[str]) -> None:
+    """
+    Count new viewers against their replicas. Caller commits.
+
+    Only pass sheets the buyer did not already hold, so counts match the
+    number of Drive permissions on each file.
+
+    Args:
+        db: Database session
+        sheet_ids: Sheets a new permission was created on
+    """
+    if sheet_ids:
+        db.query(SheetReplica).filter(SheetReplica.sheet_id.in_(sheet_ids)).update(
+            {SheetReplica.grant_count: SheetReplica.grant_count + 1},
+            synchronize_session=False
+        )
+
+
+def release_grants(db: Session, sheet_ids: List[str]) -> None:
+    """
+    Remove revoked viewers from their replicas' counts. Caller commits.
+
+    Only pass sheets whose permission was removed and that no other active
+    payment of the same buyer still covers.
+
+    Args:
+        db: Database session
+        sheet_ids: Sheets a permission was removed from (one entry per viewer)
+    """
+    for sheet_id in sheet_ids:
+        db.query(SheetReplica).filter(
+            SheetReplica.sheet_id == sheet_id,
+            SheetReplica.grant_count > 0
+        ).update(
+            {SheetReplica.grant_count: SheetReplica.grant_count - 1},
+            synchronize_session=False
+        )
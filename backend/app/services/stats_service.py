@@ -0,0 +1,109 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, Any, Optional
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import DailyStat
+
+logger = logging.getLogger(__name__)
+
+# Counter columns that can be incremented on a rollup row
+COUNTERS = ("payment_count", "amount_sum", "grant_failures", "revocations")
+
+
+def record_stat(
+    db: Session,
+    tier: Optional[int],
+    status: str,
+    at: Optional[datetime] = None,
+    **increments: int
+) -> None:
+    """
+    Increment counters on the rollup row for a day, tier and status.
+
+    The update runs in the caller's transaction, so the rollup commits
+    (or rolls back) together with the payment it describes. Caller commits.
+
+    Args:
+        db: Database session
+        tier: Product tier (None when the amount matched no tier)
+        status: Payment outcome ("granted" or "failed")
+        at: Event time (defaults to now, UTC)
+        **increments: Amounts to add to counter columns
+    """
+    day = (at or datetime.utcnow()).date()
+    tier = tier or 0
+    increments = {name: value for name, value in increments.items() if value}
+    if not increments:
+        return
+
+    def apply_update() -> int:
+        return db.query(DailyStat).filter(
+            DailyStat.day == day,
+            DailyStat.tier == tier,
+            DailyStat.status == status
+        ).update(
+            {getattr(DailyStat, name): getattr(DailyStat, name) + value for name, value in increments.items()},
+            synchronize_session=False
+        )
+
+    if apply_update():
+        return
+
+    try:
+        with db.begin_nested():
+            db.add(DailyStat(
+                day=day,
+                tier=tier,
+                status=status,
+                **{name: increments.get(name, 0) for name in COUNTERS}
+            ))
+    except IntegrityError:
+        # Another request created the row first
+        apply_update()
+
+
+def get_stats(db: Session, start: date, end: date, tier: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Summarize payments over a date range from the rollup table.
+
+    Reads at most one row per day, tier and status, so the cost depends
+    on the range length, not on the number of payments.
+
+    Args:
+        db: Database session
+        start: First day (inclusive)
+        end: Last day (inclusive)
+        tier: Restrict to a single tier
+
+    Returns:
+        Dictionary with totals and per-tier, per-status breakdown;
+        amount_sum only ever includes granted payments
+    """
+    query = db.query(
+        DailyStat.tier,
+        DailyStat.status,
+        *[func.sum(getattr(DailyStat, name)) for name in COUNTERS]
+    ).filter(DailyStat.day >= start, DailyStat.day <= end)
+
+    if tier is not None:
+        query = query.filter(DailyStat.tier == tier)
+
+    rows = query.group_by(DailyStat.tier, DailyStat.status).order_by(DailyStat.tier, DailyStat.status).all()
+
+    totals = {name: 0 for name in COUNTERS}
+    breakdown = []
+    for row_tier, status, *sums in rows:
+        entry = {name: int(value or 0) for name, value in zip(COUNTERS, sums)}
+        for name in COUNTERS:
+            totals[name] += entry[name]
+        breakdown.append({"tier": row_tier, "status": status, **entry})
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "tier": tier,
+        "totals": totals,
+        "breakdown": breakdown
+    }
@@ -0,0 +1,72 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, get_db
+from app.main import app
+from app.services.access_service import access_cache
+
+
+class FakeDriveService:
+    """
+    In-memory stand-in for GoogleDriveService.
+
+    Grants succeed unless `failing_grants` is set; revocations succeed
+    except for emails in `failing_revokes`. Batched revocations are
+    recorded in `revoke_calls`.
+    """
+
+    def __init__(self):
+        self.failing_grants = False
+        self.failing_revokes = set()
+        self.revoke_calls = []
+
+    def grant_multiple_access(self, file_ids, email):
+        return [] if self.failing_grants else list(file_ids)
+
+    def revoke_access(self, file_id, email):
+        return email not in self.failing_revokes
+
+    def revoke_multiple_access(self, file_id, emails):
+        self.revoke_calls.append((file_id, list(emails)))
+        return [email for email in emails if email not in self.failing_revokes]
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+
+
+@pytest.fixture
+def drive():
+    return FakeDriveService()
+
+
+@pytest.fixture(autouse=True)
+def clear_access_cache():
+    access_cache.clear()
+    yield
+    access_cache.clear()
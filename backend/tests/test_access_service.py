@@ -0,0 +1,119 @@
+import pytest
+
+from app.config import settings
+from app.services import access_service
+from app.services.access_service import AccessCache, access_cache, get_access_for_email
+from app.services.payment_service import PaymentService
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def sheets(monkeypatch):
+    monkeypatch.setattr(settings, "indian_sheet_id", "sheet_a")
+    monkeypatch.setattr(settings, "indian_sheet_replica_ids", None)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AccessCache(max_entries=2, ttl_seconds=30)
+    cache.set("a", {"value": "a"})
+    cache.set("b", {"value": "b"})
+    cache.get("a")
+
+    cache.set("c", {"value": "c"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": "a"}
+    assert cache.get("c") == {"value": "c"}
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AccessCache(max_entries=10, ttl_seconds=30, clock=clock)
+    cache.set("a", {"value": "a"})
+
+    clock.now = 29
+    assert cache.get("a") == {"value": "a"}
+
+    clock.now = 30
+    assert cache.get("a") is None
+
+
+def test_write_is_dropped_if_key_was_invalidated_during_read():
+    cache = AccessCache(max_entries=10, ttl_seconds=30)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+
+    cache.set("a", {"value": "stale"}, generation)
+    assert cache.get("a") is None
+
+    cache.set("a", {"value": "fresh"}, cache.generation("a"))
+    assert cache.get("a") == {"value": "fresh"}
+
+
+def test_evicted_generations_never_accept_stale_writes():
+    cache = AccessCache(max_entries=1, ttl_seconds=30)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+    cache.invalidate("b")  # Evicts the generation tracked for "a"
+
+    cache.set("a", {"value": "stale"}, generation)
+    assert cache.get("a") is None
+
+
+def test_lookup_racing_a_grant_does_not_cache_stale_access(db, drive, monkeypatch):
+    service = PaymentService(drive)
+    load_access = access_service._load_access
+
+    def load_then_grant(db, email):
+        # The grant commits after this read's snapshot was taken
+        entry = load_access(db, email)
+        service.process_payment(db, "pay_1", None, email, settings.tier_1_price)
+        return entry
+
+    monkeypatch.setattr(access_service, "_load_access", load_then_grant)
+    assert get_access_for_email(db, "buyer@example.com", "pay_1") is None
+
+    monkeypatch.setattr(access_service, "_load_access", load_access)
+    assert get_access_for_email(db, "buyer@example.com", "pay_1")["has_access"]
+
+
+def test_grant_and_revoke_invalidate_cached_access(db, drive):
+    service = PaymentService(drive)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+    assert get_access_for_email(db, "buyer@example.com", "pay_1")["granted_resources"] == ["sheet_a"]
+    assert access_cache.get("buyer@example.com") is not None
+
+    service.revoke_access_for_email(db, "buyer@example.com")
+    assert access_cache.get("buyer@example.com") is None
+    assert get_access_for_email(db, "buyer@example.com", "pay_1")["has_access"] is False
+
+    service.process_payment(db, "pay_2", None, "buyer@example.com", settings.tier_1_price)
+    assert get_access_for_email(db, "buyer@example.com", "pay_2")["has_access"]
+
+
+def test_lookup_requires_a_payment_made_with_the_email(db, drive, client):
+    service = PaymentService(drive)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+    service.process_payment(db, "pay_2", None, "other@example.com", settings.tier_1_price)
+
+    response = client.get("/access/buyer@example.com", params={"payment_id": "pay_1"})
+    assert response.status_code == 200
+    assert response.json()["granted_resources"] == ["sheet_a"]
+
+    for email, payment_id in [
+        ("buyer@example.com", "pay_2"),
+        ("buyer@example.com", "pay_missing"),
+        ("unknown@example.com", "pay_1")
+    ]:
+        response = client.get(f"/access/{email}", params={"payment_id": payment_id})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "No payment found for this email and payment ID"
@@ -0,0 +1,208 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Payment, SheetReplica
+from app.services.expiry_service import ExpiryScheduler, RETRY_DELAY_SECONDS, MAX_RETRY_DELAY_SECONDS
+
+START = datetime(2026, 1, 1)
+
+
+class FakeClock:
+    """Manually advanced UTC clock."""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs) -> None:
+        self.now += timedelta(**kwargs)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(START)
+
+
+def make_scheduler(session_factory, clock, drive, batch_size=50, heap_size=100):
+    scheduler = ExpiryScheduler(
+        batch_size=batch_size,
+        heap_size=heap_size,
+        drive_service=drive,
+        session_factory=session_factory,
+        clock=clock
+    )
+    scheduler.load()
+    return scheduler
+
+
+def add_payment(session_factory, payment_id, email, sheets, expires_in_days=None, tier=1):
+    db = session_factory()
+    try:
+        payment = Payment(
+            payment_id=payment_id,
+            email=email,
+            amount=99900,
+            product_tier=tier,
+            granted_resources=json.dumps(sheets),
+            timestamp=START,
+            expires_at=START + timedelta(days=expires_in_days) if expires_in_days is not None else None
+        )
+        db.add(payment)
+        db.commit()
+        return payment.id
+    finally:
+        db.close()
+
+
+def revoked_at(session_factory, payment_id):
+    db = session_factory()
+    try:
+        return db.query(Payment).filter(Payment.payment_id == payment_id).one().revoked_at
+    finally:
+        db.close()
+
+
+def test_only_due_grants_are_revoked(session_factory, clock, drive):
+    add_payment(session_factory, "pay_due", "due@example.com", ["sheet_a"], expires_in_days=1)
+    add_payment(session_factory, "pay_later", "later@example.com", ["sheet_a"], expires_in_days=10)
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    assert scheduler.run_due() == 0
+    assert drive.revoke_calls == []
+
+    clock.advance(days=2)
+    assert scheduler.run_due() == 1
+    assert drive.revoke_calls == [("sheet_a", ["due@example.com"])]
+    assert revoked_at(session_factory, "pay_due") == clock.now
+    assert revoked_at(session_factory, "pay_later") is None
+    assert scheduler.next_deadline() == START + timedelta(days=10)
+
+
+def test_revocations_are_batched(session_factory, clock, drive):
+    for i in range(5):
+        add_payment(session_factory, f"pay_{i}", f"user{i}@example.com", ["sheet_a"], expires_in_days=1)
+    scheduler = make_scheduler(session_factory, clock, drive, batch_size=2)
+
+    clock.advance(days=2)
+    assert [scheduler.run_due() for _ in range(4)] == [2, 2, 1, 0]
+    assert [len(emails) for _, emails in drive.revoke_calls] == [2, 2, 1]
+
+
+def test_sheet_covered_by_another_purchase_is_kept(session_factory, clock, drive):
+    add_payment(session_factory, "pay_permanent", "buyer@example.com", ["sheet_a"])
+    add_payment(session_factory, "pay_expiring", "buyer@example.com", ["sheet_a", "sheet_b"], expires_in_days=1, tier=2)
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    clock.advance(days=2)
+    assert scheduler.run_due() == 1
+    assert drive.revoke_calls == [("sheet_b", ["buyer@example.com"])]
+    assert revoked_at(session_factory, "pay_expiring") == clock.now
+    assert revoked_at(session_factory, "pay_permanent") is None
+
+
+def test_heap_is_refilled_after_horizon_truncation(session_factory, clock, drive):
+    for i in range(3):
+        add_payment(session_factory, f"pay_{i}", f"user{i}@example.com", ["sheet_a"], expires_in_days=i + 1)
+    scheduler = make_scheduler(session_factory, clock, drive, heap_size=2)
+
+    assert scheduler.next_deadline() == START + timedelta(days=1)
+
+    clock.advance(days=10)
+    assert scheduler.run_due() == 2
+    assert scheduler.next_deadline() is None
+
+    # Heap drained with a truncated horizon: the next call reloads from the index
+    assert scheduler.run_due() == 0
+    assert scheduler.next_deadline() == START + timedelta(days=3)
+    assert scheduler.run_due() == 1
+    assert revoked_at(session_factory, "pay_2") == clock.now
+
+
+def test_drive_failure_is_retried_instead_of_marked_revoked(session_factory, clock, drive):
+    add_payment(session_factory, "pay_ok", "ok@example.com", ["sheet_a"], expires_in_days=1)
+    add_payment(session_factory, "pay_fail", "fail@example.com", ["sheet_a"], expires_in_days=1)
+    drive.failing_revokes.add("fail@example.com")
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    clock.advance(days=2)
+    assert scheduler.run_due() == 1
+    assert revoked_at(session_factory, "pay_ok") == clock.now
+    assert revoked_at(session_factory, "pay_fail") is None
+    assert scheduler.next_deadline() == clock.now + timedelta(seconds=RETRY_DELAY_SECONDS)
+
+    # Not retried before the delay elapses
+    assert scheduler.run_due() == 0
+
+    drive.failing_revokes.clear()
+    clock.advance(seconds=RETRY_DELAY_SECONDS)
+    assert scheduler.run_due() == 1
+    assert revoked_at(session_factory, "pay_fail") == clock.now
+
+
+def test_schedule_is_ignored_when_not_running(session_factory, clock, drive):
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    scheduler.schedule(1, START + timedelta(days=1))
+    assert scheduler.next_deadline() is None
+
+
+def test_replica_count_released_once_per_viewer(session_factory, clock, drive):
+    db = session_factory()
+    # One permission for this buyer plus one for another viewer
+    db.add(SheetReplica(product="indian", sheet_id="sheet_a", grant_count=2))
+    db.commit()
+    db.close()
+    add_payment(session_factory, "pay_first", "buyer@example.com", ["sheet_a"], expires_in_days=1)
+    add_payment(session_factory, "pay_repeat", "buyer@example.com", ["sheet_a"], expires_in_days=1)
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    clock.advance(days=2)
+    assert scheduler.run_due() == 2
+
+    db = session_factory()
+    assert db.query(SheetReplica).one().grant_count == 1
+    db.close()
+
+
+def test_failing_revoke_does_not_block_refill_past_horizon(session_factory, clock, drive):
+    add_payment(session_factory, "pay_fail", "fail@example.com", ["sheet_a"], expires_in_days=1)
+    add_payment(session_factory, "pay_ok", "ok@example.com", ["sheet_a"], expires_in_days=2)
+    add_payment(session_factory, "pay_beyond", "beyond@example.com", ["sheet_a"], expires_in_days=3)
+    drive.failing_revokes.add("fail@example.com")
+    scheduler = make_scheduler(session_factory, clock, drive, heap_size=2)
+
+    clock.advance(days=10)
+    assert scheduler.run_due() == 1
+
+    # Only the backing-off retry is left, and it is later than the horizon:
+    # the next pass refills from the index instead of waiting on it
+    assert scheduler.run_due() == 0
+    assert scheduler.run_due() == 1
+    assert revoked_at(session_factory, "pay_beyond") == clock.now
+    assert revoked_at(session_factory, "pay_fail") is None
+
+
+def test_failed_revocations_back_off_exponentially(session_factory, clock, drive):
+    add_payment(session_factory, "pay_fail", "fail@example.com", ["sheet_a"], expires_in_days=1)
+    drive.failing_revokes.add("fail@example.com")
+    scheduler = make_scheduler(session_factory, clock, drive)
+
+    clock.advance(days=2)
+    delays = []
+    for _ in range(12):
+        assert scheduler.run_due() == 0
+        delay = scheduler.next_deadline() - clock.now
+        delays.append(delay.total_seconds())
+        clock.now = scheduler.next_deadline()
+
+    assert delays[:3] == [RETRY_DELAY_SECONDS, 2 * RETRY_DELAY_SECONDS, 4 * RETRY_DELAY_SECONDS]
+    assert delays[-1] == MAX_RETRY_DELAY_SECONDS
+    assert len(drive.revoke_calls) == 12
+
+    drive.failing_revokes.clear()
+    assert scheduler.run_due() == 1
+    assert revoked_at(session_factory, "pay_fail") == clock.now
@@ -0,0 +1,83 @@
+from app.services.google_drive_service import GoogleDriveService
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result() if callable(self.result) else self.result
+
+
+class FakeBatch:
+    def __init__(self, callback):
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self.requests:
+            self.callback(request_id, request.execute(), None)
+
+
+class FakePermissions:
+    """Paginated permission list for one file, as the Drive API returns it."""
+
+    def __init__(self, addresses, page_size):
+        self.permissions = [{"id": f"perm_{i}", "emailAddress": address} for i, address in enumerate(addresses)]
+        self.page_size = page_size
+        self.deleted = []
+
+    def list(self, fileId, fields, pageSize=None, pageToken=None):
+        start = int(pageToken or 0)
+        end = start + self.page_size
+        response = {"permissions": self.permissions[start:end]}
+        if end < len(self.permissions):
+            response["nextPageToken"] = str(end)
+        return FakeRequest(response)
+
+    def delete(self, fileId, permissionId):
+        return FakeRequest(lambda: self.deleted.append(permissionId) or {})
+
+
+class FakeDriveApi:
+    def __init__(self, permissions):
+        self._permissions = permissions
+
+    def permissions(self):
+        return self._permissions
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(callback)
+
+
+def make_service(addresses, page_size=2):
+    permissions = FakePermissions(addresses, page_size)
+    service = GoogleDriveService.__new__(GoogleDriveService)
+    service.service = FakeDriveApi(permissions)
+    return service, permissions
+
+
+def test_revoke_access_matches_email_case_insensitively():
+    service, permissions = make_service(["buyer@example.com"])
+
+    assert service.revoke_access("sheet_a", "Buyer@Example.com")
+    assert permissions.deleted == ["perm_0"]
+
+
+def test_revoke_access_finds_permission_beyond_first_page():
+    service, permissions = make_service(["a@example.com", "b@example.com", "c@example.com", "d@example.com", "e@example.com"])
+
+    assert service.revoke_access("sheet_a", "e@example.com")
+    assert permissions.deleted == ["perm_4"]
+
+
+def test_revoke_multiple_access_returns_caller_emails():
+    service, permissions = make_service(["a@example.com", "x@example.com", "b@example.com"])
+
+    revoked = service.revoke_multiple_access("sheet_a", ["A@Example.com", "b@example.com", "gone@example.com"])
+
+    assert sorted(revoked) == ["A@Example.com", "b@example.com", "gone@example.com"]
+    assert sorted(permissions.deleted) == ["perm_0", "perm_2"]
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+
+from app.services.grant_status_service import GrantStatusBroker
+
+EVENT = {"payment_id": "pay_1", "status": "granted", "message": "Access granted successfully"}
+
+
+def test_publish_wakes_every_waiter():
+    broker = GrantStatusBroker()
+
+    async def scenario():
+        waiters = [asyncio.create_task(broker.wait_for("pay_1", timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert len(broker._waiters["pay_1"]) == 3
+
+        # Webhooks publish from a worker thread
+        thread = threading.Thread(target=broker.publish, args=("pay_1", EVENT))
+        thread.start()
+        thread.join()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == [EVENT, EVENT, EVENT]
+    assert broker._waiters == {}
+
+
+def test_outcome_published_before_waiting_is_returned_immediately():
+    broker = GrantStatusBroker()
+    broker.publish("pay_1", EVENT)
+
+    # A zero timeout would return None if the wait were entered
+    assert asyncio.run(broker.wait_for("pay_1", timeout=0)) == EVENT
+    assert broker._waiters == {}
+
+
+def test_timed_out_waiters_are_removed():
+    broker = GrantStatusBroker()
+
+    async def scenario():
+        return await asyncio.gather(
+            broker.wait_for("pay_1", timeout=0.01),
+            broker.wait_for("pay_1", timeout=0.01)
+        )
+
+    assert asyncio.run(scenario()) == [None, None]
+    assert broker._waiters == {}
+
+
+def test_recent_outcomes_are_bounded():
+    broker = GrantStatusBroker(max_recent=2)
+    for payment_id in ["pay_1", "pay_2", "pay_3"]:
+        broker.publish(payment_id, {"payment_id": payment_id})
+
+    assert broker.get_recent("pay_1") is None
+    assert broker.get_recent("pay_2") == {"payment_id": "pay_2"}
+    assert broker.get_recent("pay_3") == {"payment_id": "pay_3"}
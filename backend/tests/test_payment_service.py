@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+from app.config import settings
+from app.models import Payment
+from app.services.grant_status_service import grant_status_broker
+from app.services.payment_service import PaymentService
+from app.services.stats_service import get_stats
+
+
+@pytest.fixture(autouse=True)
+def sheets(monkeypatch):
+    monkeypatch.setattr(settings, "indian_sheet_id", "sheet_a")
+    monkeypatch.setattr(settings, "indian_sheet_replica_ids", None)
+
+
+def totals(db):
+    today = date.today()
+    return get_stats(db, date(2000, 1, 1), date(today.year + 1, 1, 1))["totals"]
+
+
+def test_replayed_failure_is_counted_once(db, drive):
+    service = PaymentService(drive)
+    drive.failing_grants = True
+
+    for _ in range(3):
+        result = service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+        assert not result["success"]
+
+    assert db.query(Payment).one().status == "failed"
+    assert totals(db) == {"payment_count": 1, "amount_sum": 0, "grant_failures": 1, "revocations": 0}
+
+
+def test_failure_then_success_is_counted_as_granted_only(db, drive):
+    service = PaymentService(drive)
+    drive.failing_grants = True
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+
+    drive.failing_grants = False
+    result = service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+    assert result["success"]
+    assert result["granted_resources"] == ["sheet_a"]
+
+    payment = db.query(Payment).one()
+    assert (payment.status, payment.failure_reason) == ("granted", None)
+    assert totals(db) == {
+        "payment_count": 1,
+        "amount_sum": settings.tier_1_price,
+        "grant_failures": 0,
+        "revocations": 0
+    }
+
+    # Once granted, replays are acknowledged without being counted again
+    assert service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)["message"] == \
+        "Payment already processed"
+    assert totals(db)["payment_count"] == 1
+
+
+def test_invalid_amount_is_persisted_as_failed(db, drive):
+    service = PaymentService(drive)
+
+    service.process_payment(db, "pay_1", None, "buyer@example.com", 1)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", 1)
+
+    payment = db.query(Payment).one()
+    assert (payment.status, payment.failure_reason, payment.product_tier) == ("failed", "invalid_amount", 0)
+    assert totals(db) == {"payment_count": 1, "amount_sum": 0, "grant_failures": 0, "revocations": 0}
+
+
+def test_replayed_grant_keeps_the_published_outcome(db, drive):
+    service = PaymentService(drive)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+
+    event = grant_status_broker.get_recent("pay_1")
+    assert (event["status"], event["granted_resources"]) == ("granted", ["sheet_a"])
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.config import settings
+from app.models import Payment, SheetReplica
+from app.services.payment_service import PaymentService
+from app.services.sheet_pool_service import get_held_sheet_ids, pick_replica
+
+
+@pytest.fixture(autouse=True)
+def sheets(monkeypatch):
+    monkeypatch.setattr(settings, "indian_sheet_id", "sheet_a")
+    monkeypatch.setattr(settings, "indian_sheet_replica_ids", "sheet_b, sheet_c")
+
+
+def grant_counts(db):
+    return {replica.sheet_id: replica.grant_count for replica in db.query(SheetReplica).all()}
+
+
+def add_payment(db, payment_id, email, sheets, revoked=False):
+    db.add(Payment(
+        payment_id=payment_id,
+        email=email,
+        amount=settings.tier_1_price,
+        product_tier=1,
+        granted_resources=json.dumps(sheets),
+        revoked_at=datetime(2026, 1, 1) if revoked else None
+    ))
+    db.commit()
+
+
+def test_new_buyers_go_to_the_least_loaded_replica(db, drive):
+    service = PaymentService(drive)
+
+    for index in range(6):
+        result = service.process_payment(db, f"pay_{index}", None, f"buyer{index}@example.com", settings.tier_1_price)
+        assert result["success"]
+
+    assert grant_counts(db) == {"sheet_a": 2, "sheet_b": 2, "sheet_c": 2}
+
+    db.query(SheetReplica).filter(SheetReplica.sheet_id == "sheet_b").update({SheetReplica.grant_count: 0})
+    db.commit()
+    assert pick_replica(db, "indian", set()) == "sheet_b"
+
+
+def test_repeat_buyers_stay_on_their_replica(db, drive):
+    service = PaymentService(drive)
+    service.process_payment(db, "pay_1", None, "buyer@example.com", settings.tier_1_price)
+    held = get_held_sheet_ids(db, "buyer@example.com")
+    assert held == {"sheet_a"}
+
+    # Make another replica the least loaded; the buyer still keeps their sheet
+    db.query(SheetReplica).filter(SheetReplica.sheet_id == "sheet_a").update({SheetReplica.grant_count: 100})
+    db.commit()
+    result = service.process_payment(db, "pay_2", None, "buyer@example.com", settings.tier_1_price)
+
+    assert result["granted_resources"] == ["sheet_a"]
+    # The existing permission is reused, so the viewer is not counted twice
+    assert grant_counts(db)["sheet_a"] == 100
+
+
+def test_new_replicas_are_seeded_from_existing_grants(db, monkeypatch):
+    monkeypatch.setattr(settings, "indian_sheet_replica_ids", None)
+    add_payment(db, "pay_1", "one@example.com", ["sheet_a"])
+    add_payment(db, "pay_2", "one@example.com", ["sheet_a"])
+    add_payment(db, "pay_3", "two@example.com", ["sheet_a"])
+    add_payment(db, "pay_4", "three@example.com", ["sheet_a"], revoked=True)
+    add_payment(db, "pay_5", "four@example.com", ["sheet_b"])
+
+    # A single-sheet pool is not tracked
+    assert pick_replica(db, "indian", set()) == "sheet_a"
+    assert grant_counts(db) == {}
+
+    monkeypatch.setattr(settings, "indian_sheet_replica_ids", "sheet_b,sheet_c")
+    assert pick_replica(db, "indian", set()) == "sheet_c"
+    # Distinct active viewers per sheet
+    assert grant_counts(db) == {"sheet_a": 2, "sheet_b": 1, "sheet_c": 0}
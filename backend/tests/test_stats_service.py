@@ -0,0 +1,84 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.config import settings
+from app.services.stats_service import get_stats, record_stat
+
+
+@pytest.fixture
+def stats(db):
+    record_stat(db, 1, "granted", at=datetime(2026, 1, 1, 9), payment_count=1, amount_sum=100)
+    record_stat(db, 1, "granted", at=datetime(2026, 1, 1, 17), payment_count=1, amount_sum=100)
+    record_stat(db, 2, "granted", at=datetime(2026, 1, 2), payment_count=1, amount_sum=300)
+    record_stat(db, 2, "failed", at=datetime(2026, 1, 2), payment_count=1, grant_failures=1)
+    record_stat(db, 1, "granted", at=datetime(2026, 1, 3), payment_count=1, amount_sum=100)
+    db.commit()
+
+
+@pytest.fixture
+def admin_key(monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", "secret")
+    return "secret"
+
+
+def test_stats_are_limited_to_the_date_range(db, stats):
+    result = get_stats(db, date(2026, 1, 1), date(2026, 1, 2))
+
+    assert result["totals"] == {"payment_count": 4, "amount_sum": 500, "grant_failures": 1, "revocations": 0}
+    assert [(entry["tier"], entry["status"], entry["payment_count"]) for entry in result["breakdown"]] == [
+        (1, "granted", 2),
+        (2, "failed", 1),
+        (2, "granted", 1)
+    ]
+
+
+def test_stats_can_be_filtered_by_tier(db, stats):
+    result = get_stats(db, date(2026, 1, 1), date(2026, 1, 3), tier=1)
+
+    assert result["tier"] == 1
+    assert result["totals"] == {"payment_count": 3, "amount_sum": 300, "grant_failures": 0, "revocations": 0}
+    assert [entry["tier"] for entry in result["breakdown"]] == [1]
+
+
+def test_admin_stats_returns_the_rollup(client, stats, admin_key):
+    response = client.get(
+        "/admin/stats",
+        params={"start": "2026-01-02", "end": "2026-01-03", "tier": 2},
+        headers={"X-Admin-Key": admin_key}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["totals"]["amount_sum"] == 300
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"X-Admin-Key": "wrong"},
+    {"X-Admin-Key": "secre"},
+    {"X-Admin-Key": "sécret".encode("latin-1")}
+])
+def test_admin_stats_rejects_invalid_keys(client, admin_key, headers):
+    response = client.get("/admin/stats", headers=headers)
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid admin API key"
+
+
+def test_admin_stats_fails_closed_without_a_configured_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", None)
+
+    response = client.get("/admin/stats", headers={"X-Admin-Key": "anything"})
+
+    assert response.status_code == 500
+    assert response.json()["detail"] == "Admin API key not configured"
+
+
+def test_admin_stats_rejects_an_inverted_range(client, admin_key):
+    response = client.get(
+        "/admin/stats",
+        params={"start": "2026-01-03", "end": "2026-01-01"},
+        headers={"X-Admin-Key": admin_key}
+    )
+
+    assert response.status_code == 400